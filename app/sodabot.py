@@ -1,21 +1,139 @@
 import os
+import asyncio
+import functools
+import json
+import time
 import discord
 from dotenv import load_dotenv
 import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
 from pathlib import Path
+from typing import Awaitable, Callable
 from datetime import datetime, timezone, timedelta
 
 DB_PATH = Path(os.getenv("DB_PATH", "bot.db"))
 KST = timezone(timedelta(hours=9))
 
+# 버튼 처리마다 실행되는 쿼리 (statement cache 키 재사용)
+SQL_GET_LOBBY = "SELECT * FROM lobbies WHERE lobby_message_id = ?"
+SQL_IS_MEMBER = "SELECT 1 FROM lobby_members WHERE lobby_message_id = ? AND user_id = ? LIMIT 1"
+SQL_UPSERT_MEMBER = """
+    INSERT INTO lobby_members (
+        lobby_message_id, user_id, position1, position2, tier, joined_at
+    ) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(lobby_message_id, user_id) DO UPDATE SET
+        position1 = excluded.position1,
+        position2 = excluded.position2,
+        tier = excluded.tier
+"""
+SQL_LIST_MEMBERS = """
+    SELECT user_id, position1, position2, tier, joined_at
+    FROM lobby_members
+    WHERE lobby_message_id = ?
+    ORDER BY joined_at ASC
+"""
+# 참가자 컬럼을 앞에 두어 SQL_LIST_MEMBERS(db_list_members_tuples) 결과와 같은 순서로 접근 가능
+SQL_GET_LOBBY_WITH_MEMBERS = """
+    SELECT m.user_id, m.position1, m.position2, m.tier, m.joined_at, l.*
+    FROM lobbies l
+    LEFT JOIN lobby_members m ON m.lobby_message_id = l.lobby_message_id
+    WHERE l.lobby_message_id = ?
+    ORDER BY m.joined_at ASC
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class Lobby:
+    """lobbies 테이블 한 행 (컬럼 타입 그대로, int() 변환 불필요)"""
+    lobby_message_id: int
+    guild_id: int
+    channel_id: int
+    host_id: int
+    host_name: str | None
+    host_display: str | None
+    title: str
+    capacity: int
+    map_name: str
+    start_at: str
+    status: str
+    created_at: str
+    member_count: int
+
+
+LOBBY_COLUMNS = tuple(f.name for f in fields(Lobby))
+
+def lobby_from_row(row: sqlite3.Row | None) -> Lobby | None:
+    if row is None:
+        return None
+    return Lobby(*(row[c] for c in LOBBY_COLUMNS))
+
+
+# 로비별 캐시는 모두 최근에 넣은 CACHE_MAX_LOBBIES개만 유지 (오래된 로비부터 제거)
+# 마감/시작된 로비도 버튼이 남아 있어 상태로 지우지 않고 개수로만 제한
+CACHE_MAX_LOBBIES = 128
+
+
+def cache_put(cache: OrderedDict, key, value):
+    cache.pop(key, None)
+    cache[key] = value
+    while len(cache) > CACHE_MAX_LOBBIES:
+        cache.popitem(last=False)
+
+
+# 로비 임베드 캐시: lobby_message_id -> (임베드 생성 시점의 Lobby, 참가자, 임베드)
+# 참가자 변경 시 db_try_add_member/db_remove_member에서 무효화
+# 무효화 직후 이전 조회 결과로 다시 채워질 수 있어서 Lobby와 참가자가 모두 같을 때만 재사용
+EMBED_CACHE: "OrderedDict[int, tuple[Lobby, tuple[tuple, ...], discord.Embed]]" = OrderedDict()
+
+# 버튼 연타 시 같은 로비 조회 반복 방지: lobby_message_id -> (조회 시각, Lobby)
+# DB 워커 스레드에서만 채우고 비우므로 쓰기 이후에 이전 값이 다시 들어가지 않음
+LOBBY_CACHE: "OrderedDict[int, tuple[float, Lobby | None]]" = OrderedDict()
+LOBBY_CACHE_TTL = 0.25
+
+# lobby_message_id -> 참가자 튜플 목록 (db_list_members_tuples 형식)
+# 참가/나가기 때 한 명씩만 반영하고, 리스트는 통째로 교체해서 읽는 쪽과 충돌 없음
+MEMBERS_CACHE: "OrderedDict[int, list[tuple]]" = OrderedDict()
+
+# 참가자 조회 전용 읽기 연결 (WAL이라 쓰기 트랜잭션과 서로 막지 않음)
+READ_CONN: sqlite3.Connection | None = None
+
+# 그 외 조회/쓰기 연결: 한 번 열어 계속 재사용 (pragma, statement/page cache 유지)
+# DB 작업은 DB_EXECUTOR 워커 하나에서만 돌아서 동시에 쓰이지 않음
+# with 블록이 끝날 때 commit/rollback 되므로 트랜잭션이 다음 호출로 넘어가지 않음
+WRITE_CONN: sqlite3.Connection | None = None
+
 def db_connect() -> sqlite3.Connection:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    global WRITE_CONN
+    if WRITE_CONN is None:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-20000")
+        WRITE_CONN = conn
+    return WRITE_CONN
+
+def db_read_connect() -> sqlite3.Connection:
+    global READ_CONN
+    if READ_CONN is None:
+        conn = sqlite3.connect(
+            f"{DB_PATH.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA mmap_size=268435456")
+        READ_CONN = conn
+    return READ_CONN
 
 def init_db():
     with db_connect() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("""
         CREATE TABLE IF NOT EXISTS lobbies (
             lobby_message_id INTEGER PRIMARY KEY,
@@ -42,6 +160,43 @@ def init_db():
             PRIMARY KEY (lobby_message_id, user_id)
         )
         """)
+        # 참가자 목록 정렬(joined_at) / 활성 로비 조회용 인덱스
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_members_lobby_joined
+        ON lobby_members (lobby_message_id, joined_at)
+        """)
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_lobbies_status_created
+        ON lobbies (status, created_at DESC)
+        """)
+
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """)
+
+        # 기존 DB 마이그레이션: 참가 인원 카운터 컬럼
+        try:
+            conn.execute("ALTER TABLE lobbies ADD COLUMN member_count INTEGER NOT NULL DEFAULT 0")
+            conn.execute("""
+            UPDATE lobbies SET member_count = (
+                SELECT COUNT(*) FROM lobby_members m
+                WHERE m.lobby_message_id = lobbies.lobby_message_id
+            )
+            """)
+        except sqlite3.OperationalError:
+            pass  # 이미 컬럼 존재
+
+        # 기존 DB 마이그레이션: 임베드 푸터용 호스트 표기
+        try:
+            conn.execute("ALTER TABLE lobbies ADD COLUMN host_display TEXT")
+            conn.execute("""
+            UPDATE lobbies SET host_display = COALESCE(NULLIF(host_name, ''), '<@' || host_id || '>')
+            """)
+        except sqlite3.OperationalError:
+            pass  # 이미 컬럼 존재
         conn.commit()
 
 def now_kst() -> datetime:
@@ -77,59 +232,116 @@ def db_create_lobby(
     with db_connect() as conn:
         conn.execute("""
         INSERT INTO lobbies (
-            lobby_message_id, guild_id, channel_id, host_id, host_name,
+            lobby_message_id, guild_id, channel_id, host_id, host_name, host_display,
             title, capacity, map_name, start_at, status, created_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
-            lobby_message_id, guild_id, channel_id, host_id, host_name,
+            lobby_message_id, guild_id, channel_id, host_id, host_name, host_name or f"<@{host_id}>",
             title, capacity, map_name, start_at_iso, status, iso_kst(now_kst())
         ))
         conn.commit()
+    LOBBY_CACHE.pop(lobby_message_id, None)
 
-def db_get_lobby(lobby_message_id: int) -> sqlite3.Row | None:
+def db_get_lobby(lobby_message_id: int) -> Lobby | None:
+    with db_connect() as conn:
+        cur = conn.execute(SQL_GET_LOBBY, (lobby_message_id,))
+        lobby = lobby_from_row(cur.fetchone())
+    cache_put(LOBBY_CACHE, lobby_message_id, (time.monotonic(), lobby))
+    return lobby
+
+
+def db_get_lobby_with_members(lobby_message_id: int) -> tuple[Lobby | None, list[tuple]]:
+    """로비와 참가자 목록을 JOIN 한 번으로 조회 (참가자는 db_list_members_tuples 형식)"""
+    # 참가자 캐시가 있으면 로비 한 행만 조회 (같은 워커 스레드라 둘이 어긋나지 않음)
+    members = MEMBERS_CACHE.get(lobby_message_id)
+    if members is not None:
+        return db_get_lobby(lobby_message_id), members
     with db_connect() as conn:
-        cur = conn.execute("SELECT * FROM lobbies WHERE lobby_message_id = ?", (lobby_message_id,))
-        return cur.fetchone()
+        rows = conn.execute(SQL_GET_LOBBY_WITH_MEMBERS, (lobby_message_id,)).fetchall()
+    if not rows:
+        return None, []
+    members = [tuple(r)[:5] for r in rows if r[0] is not None]
+    cache_put(MEMBERS_CACHE, lobby_message_id, members)
+    return lobby_from_row(rows[0]), members
 
 
 def db_update_lobby_status(lobby_message_id: int, status: str):
     with db_connect() as conn:
         conn.execute("UPDATE lobbies SET status = ? WHERE lobby_message_id = ?", (status, lobby_message_id))
         conn.commit()
-
-
-def db_count_members(lobby_message_id: int) -> int:
-    with db_connect() as conn:
-        cur = conn.execute("SELECT COUNT(*) AS c FROM lobby_members WHERE lobby_message_id = ?", (lobby_message_id,))
-        row = cur.fetchone()
-        return int(row["c"]) if row else 0
-
-
-def db_list_members(lobby_message_id: int) -> list[sqlite3.Row]:
-    with db_connect() as conn:
-        cur = conn.execute("""
-            SELECT user_id, position1, position2, tier, joined_at
-            FROM lobby_members
-            WHERE lobby_message_id = ?
-            ORDER BY joined_at ASC
-        """, (lobby_message_id,))
-        return cur.fetchall()
-
-
-def db_add_member(
+    LOBBY_CACHE.pop(lobby_message_id, None)
+
+
+def db_list_members_tuples(lobby_message_id: int) -> list[tuple]:
+    # 임베드 렌더링용: Row 대신 (user_id, position1, position2, tier, joined_at) 튜플
+    cur = db_read_connect().cursor()
+    cur.row_factory = None
+    members = cur.execute(SQL_LIST_MEMBERS, (lobby_message_id,)).fetchall()
+    cache_put(MEMBERS_CACHE, lobby_message_id, members)
+    return members
+
+
+def db_list_members_by_lobby(lobby_message_ids: list[int]) -> dict[int, list[tuple]]:
+    # 여러 로비의 참가자를 한 번에 조회 (재시작 시 일괄 갱신용)
+    members: dict[int, list[tuple]] = {mid: [] for mid in lobby_message_ids}
+    if not lobby_message_ids:
+        return members
+    placeholders = ",".join("?" * len(lobby_message_ids))
+    cur = db_read_connect().cursor()
+    cur.row_factory = None
+    cur.execute(f"""
+        SELECT lobby_message_id, user_id, position1, position2, tier, joined_at
+        FROM lobby_members
+        WHERE lobby_message_id IN ({placeholders})
+        ORDER BY joined_at ASC
+    """, lobby_message_ids)
+    for row in cur:
+        members[row[0]].append(row[1:])
+    for mid, lobby_members in members.items():
+        cache_put(MEMBERS_CACHE, mid, lobby_members)
+    return members
+
+
+def db_try_add_member(
     lobby_message_id: int,
     user_id: int,
     position1: str | None,
     position2: str | None,
     tier: str | None,
-):
+) -> tuple[str, Lobby | None]:
+    """
+    로비 상태/중복/정원 확인과 참가자 추가를 한 트랜잭션으로 처리
+    - 결과: "ok" / "not_found" / "not_open" / "already" / "full"
+    - 처리 후의 로비를 함께 반환 (정원이 차면 closed로 변경됨)
+    """
     with db_connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        lobby = lobby_from_row(conn.execute(SQL_GET_LOBBY, (lobby_message_id,)).fetchone())
+        if lobby is None:
+            return "not_found", None
+        if lobby.status != "open":
+            return "not_open", lobby
+        if conn.execute(SQL_IS_MEMBER, (lobby_message_id, user_id)).fetchone() is not None:
+            return "already", lobby
+        if lobby.member_count >= lobby.capacity:
+            return "full", lobby
+
+        member = (user_id, position1, position2, tier, iso_kst(now_kst()))
+        conn.execute(SQL_UPSERT_MEMBER, (lobby_message_id, *member))
         conn.execute("""
-        INSERT OR REPLACE INTO lobby_members (
-            lobby_message_id, user_id, position1, position2, tier, joined_at
-        ) VALUES (?, ?, ?, ?, ?, ?)
-        """, (lobby_message_id, user_id, position1, position2, tier, iso_kst(now_kst())))
+        UPDATE lobbies SET
+            member_count = member_count + 1,
+            status = CASE WHEN member_count + 1 >= capacity THEN 'closed' ELSE status END
+        WHERE lobby_message_id = ?
+        """, (lobby_message_id,))
+        lobby = lobby_from_row(conn.execute(SQL_GET_LOBBY, (lobby_message_id,)).fetchone())
         conn.commit()
+    EMBED_CACHE.pop(lobby_message_id, None)
+    cache_put(LOBBY_CACHE, lobby_message_id, (time.monotonic(), lobby))
+    cached = MEMBERS_CACHE.get(lobby_message_id)
+    if cached is not None:
+        cache_put(MEMBERS_CACHE, lobby_message_id, cached + [member])
+    return "ok", lobby
 
 
 def db_remove_member(lobby_message_id: int, user_id: int) -> int:
@@ -138,19 +350,27 @@ def db_remove_member(lobby_message_id: int, user_id: int) -> int:
             "DELETE FROM lobby_members WHERE lobby_message_id = ? AND user_id = ?",
             (lobby_message_id, user_id),
         )
+        if cur.rowcount:
+            conn.execute(
+                "UPDATE lobbies SET member_count = member_count - 1 WHERE lobby_message_id = ?",
+                (lobby_message_id,),
+            )
         conn.commit()
-        return cur.rowcount
+    EMBED_CACHE.pop(lobby_message_id, None)
+    LOBBY_CACHE.pop(lobby_message_id, None)
+    cached = MEMBERS_CACHE.get(lobby_message_id)
+    if cur.rowcount and cached is not None:
+        cache_put(MEMBERS_CACHE, lobby_message_id, [m for m in cached if m[0] != user_id])
+    return cur.rowcount
 
 
 def db_is_member(lobby_message_id: int, user_id: int) -> bool:
     with db_connect() as conn:
-        cur = conn.execute("""
-            SELECT 1 FROM lobby_members WHERE lobby_message_id = ? AND user_id = ? LIMIT 1
-        """, (lobby_message_id, user_id))
+        cur = conn.execute(SQL_IS_MEMBER, (lobby_message_id, user_id))
         return cur.fetchone() is not None
 
 
-def db_list_active_lobbies() -> list[sqlite3.Row]:
+def db_list_active_lobbies() -> list[Lobby]:
     # 재시작 시 버튼/임베드 복구 대상
     with db_connect() as conn:
         cur = conn.execute("""
@@ -158,25 +378,94 @@ def db_list_active_lobbies() -> list[sqlite3.Row]:
             WHERE status IN ('open','closed','started')
             ORDER BY created_at DESC
         """)
-        return cur.fetchall()
+        return [lobby_from_row(row) for row in cur]
+
+
+# sqlite 호출 전용 워커 (1개라 쓰기 순서가 요청 순서대로 유지됨)
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sodabot-db")
+
+async def run_db(func, *args, **kwargs):
+    # sqlite 호출을 DB 워커에서 실행해 이벤트 루프 블로킹 방지
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+
+async def get_lobby_cached(lobby_message_id: int) -> Lobby | None:
+    # LOBBY_CACHE_TTL 이내 조회 결과가 있으면 DB 워커를 거치지 않음
+    entry = LOBBY_CACHE.get(lobby_message_id)
+    if entry is not None and time.monotonic() - entry[0] < LOBBY_CACHE_TTL:
+        return entry[1]
+    return await run_db(db_get_lobby, lobby_message_id)
+
+
+def db_get_state(key: str) -> str | None:
+    with db_connect() as conn:
+        cur = conn.execute("SELECT value FROM bot_state WHERE key = ?", (key,))
+        row = cur.fetchone()
+        return row["value"] if row else None
+
+
+def db_set_state(key: str, value: str):
+    with db_connect() as conn:
+        conn.execute("""
+        INSERT INTO bot_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """, (key, value))
+        conn.commit()
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 
 intents = discord.Intents.default()
 intents.guilds = True
-client = discord.Client(intents=intents)
+# 로비 메시지는 수정이 잦아 멘션이 섞여도 알림이 가지 않도록 기본값을 무음으로
+SILENT_MENTIONS = discord.AllowedMentions(everyone=False, users=False, roles=False, replied_user=False)
+client = discord.Client(intents=intents, allowed_mentions=SILENT_MENTIONS)
 
 lobbies: dict[int, dict] = {}
 
+# lobby_message_id -> 로비 메시지 (edit 시 fetch_message 생략용)
+LOBBY_MESSAGE_CACHE: "OrderedDict[int, discord.Message]" = OrderedDict()
+# lobby_message_id -> 마지막으로 edit한 payload 해시 (같은 내용이면 edit 생략)
+LAST_LOBBY_PAYLOAD_HASH: "OrderedDict[int, int]" = OrderedDict()
+
 # 포지션/티어/맵
 POSITIONS = ["탑", "정글", "미드", "원딜", "서포터"]
 TIERS = ["아이언", "브론즈", "실버", "골드", "플래티넘", "에메랄드", "다이아", "마스터", "마스터+300", "그랜드마스터", "챌린저"]
 MAPS = ["소환사의 협곡", "무작위 총력전", "무작위 총력전: 아수라장"]
 
+# db_try_add_member 실패 사유별 안내
+JOIN_FAIL_MESSAGES = {
+    "not_found": "로비 정보를 찾을 수 없습니다.",
+    "not_open": "이미 마감/시작된 로비입니다.",
+    "already": "이미 참가하셨습니다.",
+    "full": "정원이 가득 찼습니다.",
+}
+
+# 로비 상태 표기
+STATUS_KR = {"open": "모집 중", "closed": "마감", "cancelled": "취소됨", "started": "시작됨"}
+LOBBY_EMBED_COLOR = discord.Color.blurple().value
+EMPTY_MEMBERS_TEXT = "(아직 없음)"
+
 # 시작 시간 옵션
 TIME_OPTIONS = [f"{h:02d}" for h in range(24)]
 
+# Select 메뉴 옵션 (View 생성 때마다 새로 만들지 않도록 미리 생성)
+TIER_SELECT_OPTIONS = tuple(discord.SelectOption(label=t, value=t) for t in TIERS)
+POSITION_SELECT_OPTIONS = tuple(discord.SelectOption(label=p) for p in POSITIONS)
+MAP_SELECT_OPTIONS = tuple(discord.SelectOption(label=m, value=m) for m in MAPS)
+TIME_SELECT_OPTIONS = tuple(discord.SelectOption(label=t, value=t) for t in TIME_OPTIONS)
+
+# user_id -> "<@user_id>" (로비 임베드 재생성 시 재사용)
+MENTION_CACHE: dict[int, str] = {}
+
+def mention(user_id: int) -> str:
+    text = MENTION_CACHE.get(user_id)
+    if text is None:
+        text = MENTION_CACHE[user_id] = f"<@{user_id}>"
+    return text
+
+@functools.lru_cache(maxsize=1024)
 def format_start_at(start_at_iso: str) -> str:
     try:
         dt = datetime.fromisoformat(start_at_iso)
@@ -186,61 +475,127 @@ def format_start_at(start_at_iso: str) -> str:
     except Exception:
         return start_at_iso
 
-def lobby_embed_from_db(lobby_row: sqlite3.Row) -> discord.Embed:
-    cap = int(lobby_row["capacity"])
-    status = lobby_row["status"]
-    map_name = lobby_row["map_name"]
-    start_at = lobby_row["start_at"]
+async def lobby_embed_from_db(lobby: Lobby, members: list[tuple] | None = None) -> discord.Embed:
+    lobby_id = lobby.lobby_message_id
 
-    status_kr = {"open": "모집 중", "closed": "마감", "cancelled": "취소됨", "started": "시작됨"}.get(status, status)
+    # 호출부에서 이미 조회한 참가자 목록이나 캐시가 있으면 재사용, 빈 로비는 조회 생략
+    if members is None:
+        members = MEMBERS_CACHE.get(lobby_id)
+    if members is None:
+        members = await run_db(db_list_members_tuples, lobby_id) if lobby.member_count else []
+    member_key = tuple(members)
 
-    members = db_list_members(int(lobby_row["lobby_message_id"]))
+    # 로비 값과 참가자가 그대로면 이전에 만든 임베드 재사용
+    cached = EMBED_CACHE.get(lobby_id)
+    if cached is not None and cached[0] == lobby and cached[1] == member_key:
+        return cached[2]
+
+    map_name = lobby.map_name
+    status_kr = STATUS_KR.get(lobby.status, lobby.status)
     member_count = len(members)
 
     # 참가자 표기: 협곡만 포지션/티어 표시, 그 외는 멘션만
-    lines: list[str] = []
-    if map_name == "소환사의 협곡":
-        for m in members:
-            uid = int(m["user_id"])
-            p1 = m["position1"]
-            p2 = m["position2"]
-            tier = m["tier"]
-            pos = " / ".join([x for x in [p1, p2] if x]) if (p1 or p2) else "미설정"
-            t = tier if tier else "미설정"
-            lines.append(f"<@{uid}> [{pos} | {t}]")
+    # m = (user_id, position1, position2, tier, ...) 순서 (SQL_LIST_MEMBERS 참고)
+    if not members:
+        member_text = EMPTY_MEMBERS_TEXT
+    elif map_name == "소환사의 협곡":
+        member_text = "\n".join([
+            f"{mention(m[0])} [{' / '.join(filter(None, (m[1], m[2]))) or '미설정'} | {m[3] or '미설정'}]"
+            for m in members
+        ])
     else:
-        for m in members:
-            uid = int(m["user_id"])
-            lines.append(f"<@{uid}>")
-
-    member_text = "\n".join(lines) if lines else "(아직 없음)"
-
-    e = discord.Embed(
-        title=f"🎮 {lobby_row['title']}",
-        description=(
+        member_text = "\n".join([mention(m[0]) for m in members])
+
+    # 필드/푸터를 한 번에 넘겨 add_field/set_footer 호출 생략
+    # type은 API에서 받아온 임베드에 항상 들어 있어서 맞춰 줌 (재시작 시 내용 비교용)
+    e = discord.Embed.from_dict({
+        "type": "rich",
+        "title": f"🎮 {lobby.title}",
+        "description": (
             f"상태: **{status_kr}**\n"
             f"맵: **{map_name}**\n"
-            f"정원: **{member_count}/{cap}**\n"
-            f"시작시간: **{format_start_at(start_at)}**"
+            f"정원: **{member_count}/{lobby.capacity}**\n"
+            f"시작시간: **{format_start_at(lobby.start_at)}**"
         ),
-        color=discord.Color.blurple(),
-    )
-    e.add_field(name="참가자", value=member_text, inline=False)
-    try:
-        host_name = lobby_row['host_name']
-        if not host_name:
-            host_name = f"<@{lobby_row['host_id']}>"
-    except (KeyError, IndexError, TypeError):
-        host_name = f"<@{lobby_row['host_id']}>"
-    e.set_footer(text=f"호스트: {host_name}")
+        "color": LOBBY_EMBED_COLOR,
+        "fields": [{"name": "참가자", "value": member_text, "inline": False}],
+        "footer": {"text": f"호스트: {lobby.host_display}"},
+    })
+    cache_put(EMBED_CACHE, lobby_id, (lobby, member_key, e))
     return e
 
 
+async def lobby_message_payload(lobby_message_id: int) -> dict | None:
+    # 로비 메시지 edit 인자: 취소된 로비는 버튼 제거
+    lobby, members = await run_db(db_get_lobby_with_members, lobby_message_id)
+    if lobby is None:
+        return None
+    view = None if lobby.status == "cancelled" else LobbyView.persistent()
+    return {"embed": await lobby_embed_from_db(lobby, members), "view": view}
+
+
+def lobby_payload_hash(payload: dict) -> int:
+    embed = payload.get("embed")
+    embed_json = json.dumps(embed.to_dict(), sort_keys=True) if embed else ""
+    return hash((payload.get("content") or "", embed_json, payload.get("view") is not None))
+
+
+class LobbyEditCoalescer:
+    """
+    같은 로비 메시지에 대한 edit을 delay 동안 모아 한 번만 전송
+    - payload는 실제 edit 직전에 만들어 그 사이의 변경이 모두 반영됨
+    """
+    def __init__(self, delay: float = 0.5):
+        self.delay = delay
+        self.pending: dict[int, asyncio.Task] = {}
+        self.latest: dict[int, tuple[discord.Message, Callable[[], Awaitable[dict | None]]]] = {}
+
+    def schedule_edit(self, message: discord.Message, build_payload: Callable[[], Awaitable[dict | None]]):
+        self.latest[message.id] = (message, build_payload)
+        if message.id not in self.pending:
+            self.pending[message.id] = asyncio.create_task(self._edit_later(message.id))
+
+    async def _edit_later(self, message_id: int):
+        await asyncio.sleep(self.delay)
+        # 여기서부터 들어오는 요청은 다음 edit으로 예약
+        self.pending.pop(message_id, None)
+        message, build_payload = self.latest.pop(message_id)
+        try:
+            payload = await build_payload()
+            if payload is None:
+                return
+            payload_hash = lobby_payload_hash(payload)
+            if LAST_LOBBY_PAYLOAD_HASH.get(message_id) == payload_hash:
+                return
+            await message.edit(**payload)
+            cache_put(LAST_LOBBY_PAYLOAD_HASH, message_id, payload_hash)
+        except Exception as e:
+            print(f"Error editing lobby message: {e}")
+
+
+lobby_edits = LobbyEditCoalescer()
+
+
+def schedule_lobby_refresh(message: discord.Message):
+    cache_put(LOBBY_MESSAGE_CACHE, message.id, message)
+    lobby_edits.schedule_edit(message, lambda: lobby_message_payload(message.id))
+
+
+async def send_ephemeral(interaction: discord.Interaction, content: str, **kwargs):
+    # 응답 전이면 response, defer 등으로 이미 응답했으면 followup으로 전송
+    if interaction.response.is_done():
+        await interaction.followup.send(content, ephemeral=True, **kwargs)
+    else:
+        await interaction.response.send_message(content, ephemeral=True, **kwargs)
+
+
 # ---------- 참가 선택(에페메럴) ----------
 class JoinSelectionView(discord.ui.View):
-    def __init__(self, lobby_message_id: int):
+    def __init__(self, lobby_message_id: int, lobby_message: discord.Message | None = None):
         super().__init__(timeout=180)
         self.lobby_message_id = lobby_message_id
+        # 참가 버튼을 누른 로비 메시지 (갱신 시 fetch_message 생략)
+        self.lobby_message = lobby_message
         self.selected_tier: str | None = None
         self.selected_position: list[str] | None = None
 
@@ -263,38 +618,26 @@ class JoinSelectionView(discord.ui.View):
 
     @discord.ui.button(label="참가", style=discord.ButtonStyle.success, custom_id="join:confirm")
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        lobby = db_get_lobby(self.lobby_message_id)
-        if not lobby:
-            await interaction.response.send_message("로비 정보를 찾을 수 없습니다.", ephemeral=True)
-            return
-        if lobby["status"] != "open":
-            await interaction.response.send_message("이미 마감/시작된 로비입니다.", ephemeral=True)
-            return
-
-        uid = interaction.user.id
-        if db_is_member(self.lobby_message_id, uid):
-            await interaction.response.send_message("이미 참가하셨습니다.", ephemeral=True)
-            return
-        if db_count_members(self.lobby_message_id) >= int(lobby["capacity"]):
-            await interaction.response.send_message("정원이 가득 찼습니다.", ephemeral=True)
-            return
         if not self.ready():
-            await interaction.response.send_message("티어와 포지션을 모두 선택해 주세요.", ephemeral=True)
+            await send_ephemeral(interaction, "티어와 포지션을 모두 선택해 주세요.")
             return
 
+        await interaction.response.defer(ephemeral=True)
         p1, p2 = self.selected_position[0], self.selected_position[1]
-        db_add_member(self.lobby_message_id, uid, p1, p2, self.selected_tier)
-
-        # 마감 체크
-        if db_count_members(self.lobby_message_id) >= int(lobby["capacity"]):
-            db_update_lobby_status(self.lobby_message_id, "closed")
+        result, _ = await run_db(
+            db_try_add_member, self.lobby_message_id, interaction.user.id, p1, p2, self.selected_tier
+        )
+        if result != "ok":
+            await send_ephemeral(interaction, JOIN_FAIL_MESSAGES[result])
+            return
 
         # 로비 메시지 갱신
-        await interaction.response.defer(ephemeral=True)
         try:
-            if interaction.channel:
+            msg = self.lobby_message or LOBBY_MESSAGE_CACHE.get(self.lobby_message_id)
+            if msg is None and interaction.channel:
                 msg = await interaction.channel.fetch_message(self.lobby_message_id)
-                await msg.edit(embed=lobby_embed_from_db(db_get_lobby(self.lobby_message_id)), view=LobbyView.persistent())
+            if msg is not None:
+                schedule_lobby_refresh(msg)
         except Exception as e:
             print(f"Error updating lobby message on join: {e}")
 
@@ -305,7 +648,7 @@ class TierJoinSelect(discord.ui.Select):
             placeholder="티어 선택",
             min_values=1,
             max_values=1,
-            options=[discord.SelectOption(label=t, value=t) for t in TIERS],
+            options=list(TIER_SELECT_OPTIONS),
             custom_id="join:tier",
         )
 
@@ -322,7 +665,7 @@ class PositionJoinSelect(discord.ui.Select):
             placeholder="포지션 선택 (1,2순위)",
             min_values=2,
             max_values=2,
-            options=[discord.SelectOption(label=p) for p in POSITIONS],
+            options=list(POSITION_SELECT_OPTIONS),
             custom_id="join:pos",
         )
 
@@ -334,6 +677,15 @@ class PositionJoinSelect(discord.ui.Select):
 
 
 # ---------- 로비 생성(에페메럴) ----------
+@dataclass(slots=True)
+class LobbyDraft:
+    # 모달 -> 맵/시간 선택 -> 생성 단계 사이에 넘기는 입력값
+    title: str
+    capacity: int
+    map_name: str = "미설정"
+    start_time: str = "미설정"
+
+
 class CreateLobbyModal(discord.ui.Modal, title="내전 로비 생성"):
     제목 = discord.ui.TextInput(label="내전 제목", placeholder="예: 협곡 내전", default="협곡 내전")
     정원 = discord.ui.TextInput(label="모집 인원", placeholder="예: 10", default="10")
@@ -342,67 +694,62 @@ class CreateLobbyModal(discord.ui.Modal, title="내전 로비 생성"):
         try:
             capacity = int(self.정원.value)
         except ValueError:
-            await interaction.response.send_message("정원은 숫자여야 합니다.", ephemeral=True)
+            await send_ephemeral(interaction, "정원은 숫자여야 합니다.")
             return
 
         if capacity < 2 or capacity > 20:
-            await interaction.response.send_message("정원은 2~20 사이로 설정해 주세요.", ephemeral=True)
+            await send_ephemeral(interaction, "정원은 2~20 사이로 설정해 주세요.")
             return
 
-        draft = {
-            "title": str(self.제목.value),
-            "capacity": capacity,
-            "map_name": "미설정",
-            "start_hhmm": "미설정",
-        }
+        draft = LobbyDraft(title=str(self.제목.value), capacity=capacity)
 
         view = FinalizeLobbyView(draft)
-        await interaction.response.send_message("📍 맵과 시간을 선택한 뒤 '생성'을 누르세요.", view=view, ephemeral=True)
+        await send_ephemeral(interaction, "📍 맵과 시간을 선택한 뒤 '생성'을 누르세요.", view=view)
 
 
 class MapSelectSimple(discord.ui.Select):
-    def __init__(self, draft: dict):
+    def __init__(self, draft: LobbyDraft):
         self.draft = draft
         super().__init__(
             placeholder="맵 선택",
             min_values=1,
             max_values=1,
-            options=[discord.SelectOption(label=m, value=m) for m in MAPS],
+            options=list(MAP_SELECT_OPTIONS),
             custom_id="finalize:map",
         )
 
     async def callback(self, interaction: discord.Interaction):
-        self.draft["map"] = self.values[0]
+        self.draft.map_name = self.values[0]
         await self.view.render(interaction)  # type: ignore
 
 
 class TimeSelectSimple(discord.ui.Select):
-    def __init__(self, draft: dict):
+    def __init__(self, draft: LobbyDraft):
         self.draft = draft
         super().__init__(
             placeholder="시작 시간 선택",
             min_values=1,
             max_values=1,
-            options=[discord.SelectOption(label=t, value=t) for t in TIME_OPTIONS],
+            options=list(TIME_SELECT_OPTIONS),
             custom_id="finalize:time",
         )
 
 
     async def callback(self, interaction: discord.Interaction):
-        self.draft["start_time"] = f"{self.values[0]}:00"
+        self.draft.start_time = f"{self.values[0]}:00"
         await self.view.render(interaction)  # type: ignore
 
 
 class FinalizeLobbyView(discord.ui.View):
-    def __init__(self, draft: dict):
+    def __init__(self, draft: LobbyDraft):
         super().__init__(timeout=180)
         self.draft = draft
         self.add_item(MapSelectSimple(self.draft))
         self.add_item(TimeSelectSimple(self.draft))
 
     async def render(self, interaction: discord.Interaction):
-        map_name = self.draft.get("map", "미설정")
-        start_time = self.draft.get("start_time", "미설정")
+        map_name = self.draft.map_name
+        start_time = self.draft.start_time
         ok = (map_name != "미설정" and start_time != "미설정")
         color = discord.Color.green() if ok else discord.Color.gold()
         embed = discord.Embed(title="로비 생성 설정", color=color)
@@ -413,10 +760,10 @@ class FinalizeLobbyView(discord.ui.View):
 
     @discord.ui.button(label="생성", style=discord.ButtonStyle.success, custom_id="finalize:create")
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        map_name = self.draft.get("map", "미설정")
-        start_time = self.draft.get("start_time", "미설정")
+        map_name = self.draft.map_name
+        start_time = self.draft.start_time
         if map_name == "미설정" or start_time == "미설정":
-            await interaction.response.send_message("맵과 시작 시간을 모두 선택해야 합니다.", ephemeral=True)
+            await send_ephemeral(interaction, "맵과 시작 시간을 모두 선택해야 합니다.")
             return
 
         await interaction.response.defer(ephemeral=True)
@@ -425,178 +772,200 @@ class FinalizeLobbyView(discord.ui.View):
         # 채널에 로비 메시지 전송 후 message_id로 DB 저장
         channel = interaction.channel
         if channel is None:
-            await interaction.followup.send("채널 정보를 확인할 수 없습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "채널 정보를 확인할 수 없습니다.")
             return
         
         # 임베드 생성은 DB row 기반이라, 먼저 메시지 ID를 확보하고 DB insert 후 fetch하여 embed 생성
         temp_embed = discord.Embed(title="로비 생성 중...", color=discord.Color.blurple())
         msg = await channel.send(embed=temp_embed, view=LobbyView.persistent())
 
-        db_create_lobby(
+        await run_db(
+            db_create_lobby,
             lobby_message_id=msg.id,
             guild_id=interaction.guild_id or 0,
             channel_id=interaction.channel_id or 0,
             host_id=interaction.user.id,
             host_name=interaction.user.display_name or interaction.user.name or str(interaction.user.id),
-            title=self.draft["title"],
-            capacity=int(self.draft["capacity"]),
+            title=self.draft.title,
+            capacity=self.draft.capacity,
             map_name=map_name,
             start_at_iso=start_at_iso,
             status="open",
         )
 
-        lobby = db_get_lobby(msg.id)
-        await msg.edit(embed=lobby_embed_from_db(lobby), view=LobbyView.persistent())
+        # 방금 만든 로비라 참가자 없음
+        lobby = await run_db(db_get_lobby, msg.id)
+        payload = {"embed": await lobby_embed_from_db(lobby, []), "view": LobbyView.persistent()}
+        await msg.edit(**payload)
+        cache_put(LOBBY_MESSAGE_CACHE, msg.id, msg)
+        cache_put(LAST_LOBBY_PAYLOAD_HASH, msg.id, lobby_payload_hash(payload))
 
 
 # ---------- 로비 메시지 버튼 (persistent) ----------
 class LobbyView(discord.ui.View):
+    # 상태 없는 persistent view라 모든 로비 메시지가 인스턴스 하나를 공유
+    _instance: "LobbyView | None" = None
+
     def __init__(self):
         super().__init__(timeout=None)
 
-    @staticmethod
-    def persistent() -> "LobbyView":
-        return LobbyView()
+    @classmethod
+    def persistent(cls) -> "LobbyView":
+        # 이벤트 루프가 돈 뒤에 만들어야 해서 첫 호출 시 생성
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
 
-    def get_lobby(self, interaction: discord.Interaction) -> sqlite3.Row | None:
+    async def get_lobby(self, interaction: discord.Interaction) -> Lobby | None:
         if interaction.message is None:
             return None
-        return db_get_lobby(interaction.message.id)
+        return await get_lobby_cached(interaction.message.id)
 
-    def is_host(self, interaction: discord.Interaction, lobby: sqlite3.Row) -> bool:
-        return interaction.user.id == int(lobby["host_id"])
+    def is_host(self, interaction: discord.Interaction, lobby: Lobby) -> bool:
+        return interaction.user.id == lobby.host_id
 
     @discord.ui.button(label="참가", style=discord.ButtonStyle.success, custom_id="lobby:join")
     async def join_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        lobby = self.get_lobby(interaction)
+        # 버튼 핸들러는 모두 DB 조회 전에 먼저 응답 (3초 응답 제한)
+        await interaction.response.defer(ephemeral=True)
+        lobby = await self.get_lobby(interaction)
         if not lobby:
-            await interaction.response.send_message("로비 정보를 찾을 수 없습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "로비 정보를 찾을 수 없습니다.")
             return
-        if lobby["status"] != "open":
-            await interaction.response.send_message("이미 마감/시작된 로비입니다.", ephemeral=True)
+        if lobby.status != "open":
+            await send_ephemeral(interaction, "이미 마감/시작된 로비입니다.")
             return
 
-        lobby_id = int(lobby["lobby_message_id"])
+        lobby_id = lobby.lobby_message_id
         uid = interaction.user.id
 
-        if db_is_member(lobby_id, uid):
-            await interaction.response.send_message("이미 참가하셨습니다.", ephemeral=True)
-            return
+        # 협곡이 아닌 경우: 포지션/티어 저장하지 않음(NULL), 확인과 추가를 한 번에 처리
+        if lobby.map_name != "소환사의 협곡":
+            result, _ = await run_db(db_try_add_member, lobby_id, uid, None, None, None)
+            if result != "ok":
+                await send_ephemeral(interaction, JOIN_FAIL_MESSAGES[result])
+                return
 
-        if db_count_members(lobby_id) >= int(lobby["capacity"]):
-            await interaction.response.send_message("정원이 가득 찼습니다.", ephemeral=True)
+            # 메시지 갱신
+            schedule_lobby_refresh(interaction.message)
             return
 
-        # 협곡이 아닌 경우: 포지션/티어 저장하지 않음(NULL)
-        if lobby["map_name"] != "소환사의 협곡":
-            await interaction.response.defer(ephemeral=True)
-
-            db_add_member(lobby_id, uid, None, None, None)
-            # 마감 체크
-            if db_count_members(lobby_id) >= int(lobby["capacity"]):
-                db_update_lobby_status(lobby_id, "closed")
+        if await run_db(db_is_member, lobby_id, uid):
+            await send_ephemeral(interaction, JOIN_FAIL_MESSAGES["already"])
+            return
 
-            # 메시지 갱신
-            try:
-                await interaction.message.edit(embed=lobby_embed_from_db(db_get_lobby(lobby_id)), view=LobbyView.persistent())
-            except Exception as e:
-                print(f"Error editing lobby message: {e}")
+        if lobby.member_count >= lobby.capacity:
+            await send_ephemeral(interaction, JOIN_FAIL_MESSAGES["full"])
             return
 
         # 협곡인 경우: 선택 UI
-        view = JoinSelectionView(lobby_id)
-        await interaction.response.send_message("티어와 포지션을 선택한 뒤 '참가'를 누르세요.", view=view, ephemeral=True)
+        view = JoinSelectionView(lobby_id, interaction.message)
+        await send_ephemeral(interaction, "티어와 포지션을 선택한 뒤 '참가'를 누르세요.", view=view)
 
     @discord.ui.button(label="취소", style=discord.ButtonStyle.secondary, custom_id="lobby:leave")
     async def leave_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        lobby = self.get_lobby(interaction)
+        await interaction.response.defer(ephemeral=True)
+        lobby = await self.get_lobby(interaction)
         if not lobby:
-            await interaction.response.send_message("로비 정보를 찾을 수 없습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "로비 정보를 찾을 수 없습니다.")
             return
-        if lobby["status"] != "open":
-            await interaction.response.send_message("마감/시작된 로비는 취소할 수 없습니다.", ephemeral=True)
+        if lobby.status != "open":
+            await send_ephemeral(interaction, "마감/시작된 로비는 취소할 수 없습니다.")
             return
 
-        lobby_id = int(lobby["lobby_message_id"])
+        lobby_id = lobby.lobby_message_id
         uid = interaction.user.id
 
-        if not db_is_member(lobby_id, uid):
-            await interaction.response.send_message("참가 상태가 아닙니다.", ephemeral=True)
+        # 참가 여부 확인 없이 바로 삭제: 지워진 행이 없으면 참가 상태가 아님
+        if not await run_db(db_remove_member, lobby_id, uid):
+            await send_ephemeral(interaction, "참가 상태가 아닙니다.")
             return
-
-        await interaction.response.defer(ephemeral=True)
-        db_remove_member(lobby_id, uid)
-
-        await interaction.message.edit(embed=lobby_embed_from_db(db_get_lobby(lobby_id)), view=LobbyView.persistent())
+        schedule_lobby_refresh(interaction.message)
 
     @discord.ui.button(label="마감", style=discord.ButtonStyle.danger, custom_id="lobby:close")
     async def close_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        lobby = self.get_lobby(interaction)
+        await interaction.response.defer(ephemeral=True)
+        lobby = await self.get_lobby(interaction)
         if not lobby:
-            await interaction.response.send_message("로비 정보를 찾을 수 없습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "로비 정보를 찾을 수 없습니다.")
             return
         if not self.is_host(interaction, lobby):
-            await interaction.response.send_message("호스트만 마감할 수 있습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "호스트만 마감할 수 있습니다.")
             return
-        if lobby["status"] != "open":
-            await interaction.response.send_message("이미 마감/시작된 로비입니다.", ephemeral=True)
+        if lobby.status != "open":
+            await send_ephemeral(interaction, "이미 마감/시작된 로비입니다.")
             return
 
-        lobby_id = int(lobby["lobby_message_id"])
+        lobby_id = lobby.lobby_message_id
 
-        await interaction.response.defer(ephemeral=True)
-        db_update_lobby_status(lobby_id, "closed")
-        await interaction.message.edit(embed=lobby_embed_from_db(db_get_lobby(lobby_id)), view=LobbyView.persistent())
+        await run_db(db_update_lobby_status, lobby_id, "closed")
+        schedule_lobby_refresh(interaction.message)
 
     @discord.ui.button(label="시작", style=discord.ButtonStyle.primary, custom_id="lobby:start")
     async def start_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        lobby = self.get_lobby(interaction)
+        await interaction.response.defer(ephemeral=True)
+        lobby = await self.get_lobby(interaction)
         if not lobby:
-            await interaction.response.send_message("로비 정보를 찾을 수 없습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "로비 정보를 찾을 수 없습니다.")
             return
         if not self.is_host(interaction, lobby):
-            await interaction.response.send_message("호스트만 시작할 수 있습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "호스트만 시작할 수 있습니다.")
             return
-        if lobby["status"] == "started":
-            await interaction.response.send_message("이미 시작된 로비입니다.", ephemeral=True)
+        if lobby.status == "started":
+            await send_ephemeral(interaction, "이미 시작된 로비입니다.")
             return
 
-        lobby_id = int(lobby["lobby_message_id"])
+        lobby_id = lobby.lobby_message_id
 
-        await interaction.response.defer(ephemeral=True)
-        db_update_lobby_status(lobby_id, "started")
-        await interaction.message.edit(embed=lobby_embed_from_db(db_get_lobby(lobby_id)), view=LobbyView.persistent())
+        await run_db(db_update_lobby_status, lobby_id, "started")
+        schedule_lobby_refresh(interaction.message)
 
     @discord.ui.button(label="내전 취소", style=discord.ButtonStyle.danger, custom_id="lobby:cancel")
     async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        lobby = self.get_lobby(interaction)
+        await interaction.response.defer(ephemeral=True)
+        lobby = await self.get_lobby(interaction)
         if not lobby:
-            await interaction.response.send_message("로비 정보를 찾을 수 없습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "로비 정보를 찾을 수 없습니다.")
             return
         if not self.is_host(interaction, lobby):
-            await interaction.response.send_message("호스트만 취소할 수 있습니다.", ephemeral=True)
+            await send_ephemeral(interaction, "호스트만 취소할 수 있습니다.")
             return
 
-        lobby_id = int(lobby["lobby_message_id"])
+        lobby_id = lobby.lobby_message_id
 
-        await interaction.response.defer(ephemeral=True)
-        db_update_lobby_status(lobby_id, "cancelled")
+        await run_db(db_update_lobby_status, lobby_id, "cancelled")
 
-        # 메시지 버튼 제거
-        await interaction.message.edit(embed=lobby_embed_from_db(db_get_lobby(lobby_id)), view=None)
+        # 메시지 버튼 제거 (lobby_message_payload에서 view=None)
+        schedule_lobby_refresh(interaction.message)
+        LOBBY_MESSAGE_CACHE.pop(lobby_id, None)
 
 
 # ---------- 로비 생성 패널(채널에 설치되는 버튼) ----------
 class CreateLobbyView(discord.ui.View):
+    # LobbyView와 같이 인스턴스 하나를 패널 전송/add_view에서 공유
+    _instance: "CreateLobbyView | None" = None
+
     def __init__(self):
         super().__init__(timeout=None)
 
+    @classmethod
+    def persistent(cls) -> "CreateLobbyView":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
     @discord.ui.button(label="🎮 내전 로비 생성", style=discord.ButtonStyle.blurple, custom_id="create_lobby_btn")
     async def create_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_modal(CreateLobbyModal())
 
 
+# 패널로 확인된(또는 직접 올린) 메시지 ID: 다시 확인할 때 임베드/컴포넌트 검사 생략
+PANEL_MESSAGE_IDS: set[int] = set()
+
+
 def is_lobby_panel_message(msg: discord.Message) -> bool:
+    if msg.id in PANEL_MESSAGE_IDS:
+        return True
     if msg.author != client.user:
         return False
     if not msg.embeds:
@@ -606,81 +975,169 @@ def is_lobby_panel_message(msg: discord.Message) -> bool:
     for row in msg.components:
         for comp in row.children:
             if getattr(comp, "custom_id", None) == "create_lobby_btn":
+                PANEL_MESSAGE_IDS.add(msg.id)
                 return True
     return False
 
 
+def save_panel_location(channel_id: int, message_id: int):
+    db_set_state("panel_channel_id", str(channel_id))
+    db_set_state("panel_message_id", str(message_id))
+
+
+async def stored_panel_exists() -> bool:
+    # 저장된 패널 메시지 ID로 1회 조회 (채널 history 스캔 생략)
+    channel_id = await run_db(db_get_state, "panel_channel_id")
+    message_id = await run_db(db_get_state, "panel_message_id")
+    if not channel_id or not message_id:
+        return False
+
+    channel = client.get_channel(int(channel_id))
+    if channel is None:
+        return False
+    try:
+        msg = await channel.fetch_message(int(message_id))
+    except Exception:
+        return False
+    return is_lobby_panel_message(msg)
+
+
+async def find_panel_in_channel(channel: discord.TextChannel) -> discord.Message | None:
+    async for msg in channel.history(limit=30):
+        if is_lobby_panel_message(msg):
+            return msg
+    return None
+
+
 async def install_panel_if_missing():
     # 서버 1개 기준: 첫 guild에만 설치
     for guild in client.guilds:
-        installed = False
-
-        for channel in guild.text_channels:
-            if not channel.permissions_for(guild.me).send_messages:
-                continue
-            try:
-                async for msg in channel.history(limit=30):
-                    if is_lobby_panel_message(msg):
-                        installed = True
-                        break
-            except Exception:
-                continue
-            if installed:
+        installed = await stored_panel_exists()
+        if installed:
+            break
+
+        # 메시지를 보낼 수 있는 채널은 한 번만 골라서 스캔/설치에 같이 사용
+        channels = [c for c in guild.text_channels if c.permissions_for(guild.me).send_messages]
+
+        # 채널별 history 조회를 동시에 실행
+        results = await asyncio.gather(
+            *(find_panel_in_channel(c) for c in channels),
+            return_exceptions=True,
+        )
+        for channel, msg in zip(channels, results):
+            if isinstance(msg, discord.Message):
+                await run_db(save_panel_location, channel.id, msg.id)
+                installed = True
                 break
 
-        if not installed:
-            for channel in guild.text_channels:
-                if channel.permissions_for(guild.me).send_messages:
-                    embed = discord.Embed(
-                        title="🎮 롤 내전 로비",
-                        description="아래 버튼을 클릭하여 로비를 생성하세요!",
-                        color=discord.Color.blurple(),
-                    )
-                    await channel.send(embed=embed, view=CreateLobbyView())
-                    installed = True
-                    break
+        if not installed and channels:
+            channel = channels[0]
+            embed = discord.Embed(
+                title="🎮 롤 내전 로비",
+                description="아래 버튼을 클릭하여 로비를 생성하세요!",
+                color=discord.Color.blurple(),
+            )
+            msg = await channel.send(embed=embed, view=CreateLobbyView.persistent())
+            PANEL_MESSAGE_IDS.add(msg.id)
+            await run_db(save_panel_location, channel.id, msg.id)
 
         break
 
+def message_matches_payload(msg: discord.Message, payload: dict) -> bool:
+    # 이미 올라가 있는 로비 메시지가 payload와 같은 내용인지 비교
+    embed = payload.get("embed")
+    if not msg.embeds or embed is None or msg.embeds[0].to_dict() != embed.to_dict():
+        return False
+    view = payload.get("view")
+    expected_ids = {item.custom_id for item in view.children} if view is not None else set()
+    current_ids = {
+        getattr(comp, "custom_id", None)
+        for row in msg.components
+        for comp in getattr(row, "children", ())
+    }
+    return current_ids == expected_ids
+
+
+async def restore_lobby_message(lobby: Lobby, members: list[tuple]):
+    lobby_id = lobby.lobby_message_id
+
+    channel = client.get_channel(lobby.channel_id)
+    if channel is None:
+        return
+
+    try:
+        msg = LOBBY_MESSAGE_CACHE.get(lobby_id) or await channel.fetch_message(lobby_id)
+    except discord.NotFound:
+        # 로비 메시지가 지워진 경우
+        return
+    except discord.HTTPException as e:
+        print(f"Error fetching lobby message {lobby_id} on restore: {e}")
+        return
+    cache_put(LOBBY_MESSAGE_CACHE, lobby_id, msg)
+
+    embed = await lobby_embed_from_db(lobby, members)
+
+    # cancelled이면 view 제거(남아있을 경우)
+    view = None if lobby.status == "cancelled" else LobbyView.persistent()
+    payload = {"embed": embed, "view": view}
+
+    # 임베드와 버튼이 이미 같으면 edit 생략 (버튼 동작은 add_view로 등록된 persistent view가 처리)
+    if not message_matches_payload(msg, payload):
+        try:
+            await msg.edit(**payload)
+        except discord.HTTPException as e:
+            print(f"Error restoring lobby message {lobby_id}: {e}")
+            return
+    cache_put(LAST_LOBBY_PAYLOAD_HASH, lobby_id, lobby_payload_hash(payload))
+
+
+# 재시작 시 동시에 처리할 로비 수 (한꺼번에 요청해 429가 나지 않도록 제한)
+RESTORE_CONCURRENCY = 5
+
+
 async def restore_lobbies_on_start():
     # 재시작 시 DB 기반으로 로비 메시지에 View 재부착 + 임베드 최신화
-    for lobby in db_list_active_lobbies():
-        lobby_id = int(lobby["lobby_message_id"])
-        channel_id = int(lobby["channel_id"])
+    active_lobbies = await run_db(db_list_active_lobbies)
+    members_by_lobby = await run_db(db_list_members_by_lobby, [l.lobby_message_id for l in active_lobbies])
 
-        channel = client.get_channel(channel_id)
-        if channel is None:
-            continue
+    sem = asyncio.Semaphore(RESTORE_CONCURRENCY)
 
-        try:
-            msg = await channel.fetch_message(lobby_id)
-        except Exception:
-            continue
-
-        # cancelled이면 view 제거(남아있을 경우)
-        if lobby["status"] == "cancelled":
-            try:
-                await msg.edit(embed=lobby_embed_from_db(lobby), view=None)
-            except Exception:
-                pass
-            continue
+    async def restore_one(lobby: Lobby):
+        async with sem:
+            await restore_lobby_message(lobby, members_by_lobby[lobby.lobby_message_id])
 
-        try:
-            await msg.edit(embed=lobby_embed_from_db(db_get_lobby(lobby_id)), view=LobbyView.persistent())
-        except Exception:
-            pass
+    results = await asyncio.gather(*(restore_one(l) for l in active_lobbies), return_exceptions=True)
+    for lobby, result in zip(active_lobbies, results):
+        if isinstance(result, Exception):
+            print(f"Error restoring lobby {lobby.lobby_message_id}: {result}")
+
+
+@client.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    LOBBY_MESSAGE_CACHE.pop(payload.message_id, None)
+    LAST_LOBBY_PAYLOAD_HASH.pop(payload.message_id, None)
+    MEMBERS_CACHE.pop(payload.message_id, None)
+    PANEL_MESSAGE_IDS.discard(payload.message_id)
+
+
+# 재연결 시에도 on_ready가 다시 호출되므로 초기화/패널 설치/로비 복구는 처음 한 번만
+READY_ONCE = False
 
 
 @client.event
 async def on_ready():
-    init_db()
+    global READY_ONCE
+    if READY_ONCE:
+        print(f"Reconnected as {client.user} (ID: {client.user.id})")
+        return
+    READY_ONCE = True
+
+    await run_db(init_db)
 
     # persistent view 등록
-    client.add_view(CreateLobbyView())
+    client.add_view(CreateLobbyView.persistent())
     client.add_view(LobbyView.persistent())
 
-    print(f"Logged in as {client.user} (ID: {client.user.id})")
-
     print(f"Logged in as {client.user} (ID: {client.user.id})")
     print(f"DB_PATH = {DB_PATH.resolve()}")
 